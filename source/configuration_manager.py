@@ -2,25 +2,49 @@
 Proivdes the ConfigurationManager class to manage application configuration.
 """
 
-from os.path import dirname, abspath, isabs
-from logging import Logger
-from json import load, JSONDecodeError
-from threading import Thread
-from magic import Magic
+from os import stat
+from os.path import dirname, abspath, isabs, realpath
+from re import sub
+from time import time_ns
+from hashlib import blake2b
+from logging import getLogger
+from json import loads, JSONDecodeError
+from threading import Thread, Event
+from queue import Queue, Full
+from typing import Optional
 
-from watchdog.events import FileSystemEventHandler
-from watchdog.observers import Observer
+from watchfiles import watch, Change
 
 from source.event_manager import EventManager
 
-class ConfigurationManager(FileSystemEventHandler):
+try:
+    # On-Demand parser which only materializes the accessed values
+    import simdjson
+except ImportError:
+    simdjson = None
+
+class ConfigurationManager:
     """
     Manages the configuration of the application by reading from a JSON file.
 
     It watches for changes in the configuration file and reloads the configuration
     when the file is modified. It also provides a structured way to access configuration.
     """
-    def __init__(self, config_path: str = "configuration.json", event_manager = EventManager()):
+    # Filesystems on which native change notifications (e.g. inotify) are not delivered
+    # for modifications made by other machines. These are watched by polling instead.
+    NETWORK_FILESYSTEMS = frozenset({
+        "nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "afs",
+        "ceph", "glusterfs", "lustre", "fuse.sshfs", "davfs"
+    })
+    DEFAULT_POLL_INTERVAL = 30
+    # Milliseconds without further changes after which a burst of changes is reloaded once
+    DEBOUNCE_INTERVAL = 50
+    # Nanoseconds during which a freshly written file may be rewritten without its modification
+    # time changing, due to the coarse timestamp granularity of some filesystems.
+    RACY_WINDOW = 2_000_000_000
+
+    def __init__(self, config_path: str = "configuration.json",
+                       event_manager: Optional[EventManager] = None):
 
         """
         Intializes the ConfigurationManager with a path to the configuration file.
@@ -29,99 +53,259 @@ class ConfigurationManager(FileSystemEventHandler):
                             to an absolute path.
         :param event_manager: An instance of EventManager to emit events when the configuration
                             is reloaded. Can be replaced with a custom event manager if needed.
+                            Defaults to the shared EventManager.
         """
         if not isabs(config_path):
             self.__config_path = abspath(config_path)
         else:
             self.__config_path = config_path
         self.__watch_dir = dirname(self.__config_path)
-        self.__event_manager = event_manager
+        # Some backends (e.g. FSEvents) report symlink-resolved paths, so both spellings are
+        # precomputed once instead of normalizing every reported path in the filter.
+        self.__watched_paths = frozenset((self.__config_path, realpath(self.__config_path)))
+        self.__event_manager = event_manager if event_manager is not None else EventManager()
         self.__configuration = {}
-        self.__logger = Logger("ConfigurationManager")
+        self.__logger = getLogger("ConfigurationManager")
+        self.__stop_event = Event()
+        self.__last_signature = None
+        self.__last_digest = None
+        self.__racy_signature = False
+        # Holds at most one pending reload, so that bursts of changes collapse into one rebuild
+        self.__reload_queue = Queue(maxsize=1)
 
-        # Launch observer
-        self.__observer = Observer()
-        self.__observer.schedule(self, path=self.__watch_dir, recursive=False)
-        self.__observer_thread = Thread(target=self.__observer.start)
-        self.__observer_thread.daemon = True
-        self.__observer_thread.start()
+        self.__configuration_changed()
+        if not self.__build_configuration():
+            raise ValueError(f"Unable to load configuration file {self.__config_path}.")
 
-        self.__build_configuration()
+        # Launch reload worker and watcher
+        self.__reload_thread = Thread(target=self.__reload_loop)
+        self.__reload_thread.daemon = True
+        self.__reload_thread.start()
+
+        self.__watcher_thread = Thread(target=self.__watch_loop)
+        self.__watcher_thread.daemon = True
+        self.__watcher_thread.start()
 
     def stop(self):
         """
-        Stops the watchdog observer thread to allow graceful shutdown.
+        Stops the watcher and reload threads to allow graceful shutdown.
         """
-        self.__observer.stop()
-        self.__observer.join()
+        self.__stop_event.set()
+        self.__watcher_thread.join()
+
+        # Wakes the reload thread up. A pending reload already does, so a full queue is fine.
+        try:
+            self.__reload_queue.put_nowait(True)
+        except Full:
+            pass
+        self.__reload_thread.join()
+
+    def __watch_loop(self):
+        """
+        Watches the configuration file and schedules a reload whenever it changes.
+
+        The reload itself is performed by the reload thread, so that reading and parsing
+        the file never delays the delivery of further changes.
 
-    def on_modified(self, event):
+        Native notifications (inotify on Linux) are used whenever possible. Network filesystems
+        fall back to polling, with an interval configured through `WatchPollInterval`.
         """
-        Triggered when the configuration file is modified.
-        
-        On trigger, it re-reads the configuration and emits a reload event
+        # By default, watchfiles decides whether to poll (e.g. on WSL) with its own interval
+        polling_options = {}
+
+        fs_type = ConfigurationManager.__filesystem_type(self.__watch_dir)
+        if fs_type in ConfigurationManager.NETWORK_FILESYSTEMS:
+            poll_interval = self.__configuration.get("WatchPollInterval",
+                                                     ConfigurationManager.DEFAULT_POLL_INTERVAL)
+            self.__logger.info("Configuration resides on %s. Polling every %s seconds.",
+                               fs_type, str(poll_interval))
+            polling_options = {"force_polling": True, "poll_delay_ms": int(poll_interval * 1000)}
+
+        for _ in watch(self.__watch_dir,
+                       watch_filter=self.__is_configuration_change,
+                       step=ConfigurationManager.DEBOUNCE_INTERVAL,
+                       stop_event=self.__stop_event,
+                       recursive=False,
+                       **polling_options):
+            try:
+                self.__reload_queue.put_nowait(True)
+            except Full:
+                # A reload is already pending and will observe the latest contents
+                pass
+
+    def __reload_loop(self):
+        """
+        Consumes scheduled reloads until stopped.
+
+        On every reload, it re-reads the configuration and emits a reload event
         to let interested parties know of the changes in the configuration.
+        Failed reloads are logged, and the thread keeps serving further changes.
+        """
+        while True:
+            self.__reload_queue.get()
+            if self.__stop_event.is_set():
+                return
+
+            try:
+                self.__reload()
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.__logger.exception("Failed to reload the configuration.")
+
+    def __reload(self):
+        """
+        Reloads the configuration if its contents changed and emits the reload event.
+        """
+        if not self.__configuration_changed():
+            self.__logger.debug("Configuration file contents unchanged. Skipping reload.")
+            return
+
+        self.__logger.info("Configuration file changed. Reloading...")
+        if not self.__build_configuration():
+            self.__logger.error("Keeping the previous configuration.")
+            return
+
+        self.__event_manager.emit(
+            self.__configuration["EventNames"]["ConfigurationReloaded"], self.__configuration)
+
+    def __is_configuration_change(self, change: Change, path: str) -> bool:
+        """
+        Filters out changes to other files in the watched directory, as well as
+        the removal of the configuration file (e.g. an editor replacing it).
+        """
+        return change != Change.deleted and path in self.__watched_paths
+
+    def __configuration_changed(self) -> bool:
         """
-        if abspath(event.src_path) == self.__config_path:
-            self.__logger.info("Configuration file changed. Reloading...")
-            self.__build_configuration()
-            self.__event_manager.emit(
-                self.__configuration["EventNames"]["ConfigurationReloaded"], self.__configuration)
+        Checks whether the contents of the configuration file changed since the last check.
 
-    def __build_configuration(self):
+        The file is only hashed when its modification time or size differ from the previous
+        check, so that spurious events (e.g. repeated saves, `touch`) do not trigger a reload.
+        Signatures recorded shortly after a write cannot be trusted and always lead to hashing.
+        """
+        try:
+            file_stat = stat(self.__config_path)
+            signature = (file_stat.st_mtime_ns, file_stat.st_size)
+            if signature == self.__last_signature and not self.__racy_signature:
+                return False
+
+            with open(self.__config_path, "rb") as file:
+                digest = blake2b(file.read(), digest_size=16).digest()
+        except OSError as err:
+            self.__logger.error("Unable to read configuration file %s: %s",
+                                self.__config_path, err.strerror)
+            return False
+
+        self.__last_signature = signature
+        self.__racy_signature = \
+            time_ns() - file_stat.st_mtime_ns < ConfigurationManager.RACY_WINDOW
+        if digest == self.__last_digest:
+            return False
+
+        self.__last_digest = digest
+        return True
+
+    @staticmethod
+    def __filesystem_type(path: str) -> str:
+        """
+        Returns the type of the filesystem on which `path` is mounted, or an empty string
+        if it cannot be determined (e.g. on platforms without `/proc/mounts`).
+        """
+        path = realpath(path)
+        fs_type, mount_point = "", ""
+
+        try:
+            with open("/proc/mounts", "r", encoding='utf-8') as mounts:
+                for line in mounts:
+                    fields = line.split()
+                    if len(fields) < 3:
+                        continue
+
+                    # Whitespace and backslashes in mount points are escaped as octal sequences
+                    point = sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)),
+                                fields[1])
+                    if len(point) < len(mount_point):
+                        continue
+                    if path == point or path.startswith(point.rstrip("/") + "/"):
+                        fs_type, mount_point = fields[2], point
+        except OSError:
+            return ""
+
+        return fs_type
+
+    def __build_configuration(self) -> bool:
+        """
+        Reads the configuration file and replaces the current configuration.
+
+        :return: Whether the file could be parsed. Otherwise the current configuration is kept.
+        """
         # Local object so that JSON root node is released after extraction
         parser = ConfigurationManager.JSONParser(self.__config_path)
-        self.__configuration = {
-            "Mitigation": None if not parser["EnableMitigation"]
+        if not parser.is_loaded():
+            return False
+
+        mitigation = parser["MitigationConfiguration"] if parser["EnableMitigation"] else None
+
+        # Built aside and swapped in at once, so that readers never observe a partial configuration
+        configuration = {
+            "Mitigation": None if not mitigation
                                else {
-                                    "FlagsBeforeActivation": parser["MitigationConfiguration"]
-                                                                   ["FlagsBeforeActivation"]
-                                                                   ["Value"],
-                                    "DeflagsBeforeDeactivation": parser["MitigationConfiguration"]
-                                                                       ["DeflagsBeforeDeactivation"]
-                                                                       ["Value"],
+                                    "FlagsBeforeActivation":
+                                        mitigation["FlagsBeforeActivation"]["Value"],
+                                    "DeflagsBeforeDeactivation":
+                                        mitigation["DeflagsBeforeDeactivation"]["Value"],
                                },
-            "Thresholds": { },
-            "EventNames": { }
+            "Thresholds": ConfigurationManager.__extract_values(parser["Thresholds"]),
+            "EventNames": ConfigurationManager.__extract_values(parser["EventNames"])
         }
 
-        # Initialize thresholds
-        for key in parser["Thresholds"]:
-            self.__configuration["Thresholds"][key] = parser["Thresholds"][key]["Value"]
+        # Performance configuration is stored at the top level
+        configuration.update(ConfigurationManager.__extract_values(parser["Performance"]))
+        self.__configuration = configuration
+        return True
 
-        # Initialize performance configuration
-        for key in parser["Performance"]:
-            self.__configuration[key] = parser["Performance"][key]["Value"]
+    @staticmethod
+    def __extract_values(section) -> dict:
+        """
+        Extracts the `Value` of every option within a configuration section.
 
-        # Initialize event names
-        for key in parser["EventNames"]:
-            self.__configuration["EventNames"][key] = parser["EventNames"][key]["Value"]
+        The section is looked up once, rather than once per option.
+        """
+        return {key: section[key]["Value"] for key in section if key != "Description"}
 
     class JSONParser:
         """
         Inner class to handle JSON parsing and configuration extraction.
         """
         def __init__(self, config_file: str = ""):
-            self.__logger = Logger("ConfigurationManager.JSONParser")
+            self.__logger = getLogger("ConfigurationManager.JSONParser")
             self.__logger.debug("Creating JSONParser for file: %s", config_file)
             self.__loaded_json = False
 
-            mime = Magic(mime=True)
-            if mime.from_file(config_file) not in ["application/json", "text/plain"]:
-                self.__logger.error("Invalid file type for configuration: %s!", config_file)
-                return
-
             try:
-                with open(config_file, "r", encoding='utf-8') as file:
+                with open(config_file, "rb") as file:
                     if not file.readable():
                         self.__logger.error("Configuration file is not readable: %s!", config_file)
                         return
 
-                    self.__config = load(file)
-                    self.__loaded_json = True
+                    data = file.read()
+
+                if simdjson is not None:
+                    self.__config = simdjson.Parser().parse(data)
+                else:
+                    self.__config = loads(data)
+                self.__loaded_json = True
             except JSONDecodeError as err:
                 self.__logger.error("Error parsing configuration file: %s!", config_file)
                 self.__logger.error("%s at line %d column %d.", err.msg, err.lineno, err.colno)
+            except ValueError as err:
+                self.__logger.error("Error parsing configuration file: %s!", config_file)
+                self.__logger.error("%s", str(err))
+
+        def is_loaded(self) -> bool:
+            """
+            Returns whether the configuration file was read and parsed successfully.
+            """
+            return self.__loaded_json
 
         def __getitem__(self, name: str = ""):
             """
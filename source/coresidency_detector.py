@@ -2,15 +2,20 @@
 CoResidencyDetector is a singleton class that detects which hosts are probing for co-residency.
 """
 
-from logging import Logger
-from collections import deque
+from logging import getLogger, DEBUG
+from collections import defaultdict
+from contextlib import contextmanager, ExitStack
+from functools import partial
 from threading import Lock
-from typing import Dict
+from typing import Dict, Optional
 
-import sys
+import numpy as np
 
 from source.meta.singleton import SingletonMeta
 from source.event_manager import EventManager
+from source.kernels import evaluate_hosts
+
+logger = getLogger("CoResidencyDetector")
 
 class CoResidencyDetector(metaclass=SingletonMeta):
     """
@@ -19,49 +24,107 @@ class CoResidencyDetector(metaclass=SingletonMeta):
     metrics samples, calculates normalized metrics, and stores host metadata such as activity status
     and deltas.
     """
+    # Configuration options which shape the per-host metric windows
+    HOST_METRICS_OPTIONS = ("MaxSamples", "SamplesBeforeInclusion",
+                            "SamplesBeforeExclusion", "NormalizeSamples")
+    # Number of locks across which the recording of samples is spread
+    LOCK_STRIPES = 16
 
-    def __init__(self, configuration: Dict, event_manager = EventManager()):
+    def __init__(self, configuration: Dict, event_manager: Optional[EventManager] = None):
         """
         Initializes the CoResidencyDetector with a configuration and an event manager.
 
         :param configuration: A dictionary containing the configuration parameters for the detector.
         :param event_manager: An instance of EventManager to enable communication with other
                     components of the control plane. This can be replaced with a custom event
-                    manager if needed.
+                    manager if needed. Defaults to the shared EventManager.
         """
-        self.__event_manager = event_manager
+        self.__event_manager = event_manager if event_manager is not None else EventManager()
         self.__configuration = configuration
+        # The lock guards the shared detector state, while each stripe guards the sample
+        # windows of the hosts hashed to it. The lock is always acquired before any stripe.
         self.__lock = Lock()
-        self.__logger = Logger("CoResidencyDetector")
+        self.__stripes = tuple(Lock() for _ in range(CoResidencyDetector.LOCK_STRIPES))
 
         # Global variables exposed to be used in the rest of the control plane
         self.host_metrics = {}
-        self.host_flags = {}
-        self.host_deflags = {}
-        self.global_metrics = {}
+        self.host_flags = defaultdict(int)
+        self.host_deflags = defaultdict(int)
         self.mitigated_host_ids = set()
+        # Metric names and global metrics vector of the latest sample (see `global_metrics`)
+        self.__global_metrics = None
+
+        # Configuration values resolved once per (re)configuration
+        # Names of the metrics compared across hosts: the configured thresholds and Activity
+        self.__metric_keys = None
+        # Columns compared against their thresholds, and the threshold vector (one per column)
+        self.__thresholds = None
+        self.__mitigation_enabled = False
+        self.__flags_before_activation = 0
+        self.__deflags_before_deactivation = 0
+        self.__start_mitigation_event = None
+        self.__stop_mitigation_event = None
+        self.__make_host_metrics = None
+        self.__resolve_configuration()
 
         # Subscribe to events
         self.__event_manager.on(
             self.__configuration["EventNames"]["ConfigurationReloaded"], self.__update_config)
         self.__event_manager.on(
             self.__configuration["EventNames"]["SampleEvent"], self.__update_metrics)
-        self.__logger.info("Initialized Co-Residency Detector.")
+        logger.info("Initialized Co-Residency Detector.")
+
+    @property
+    def global_metrics(self) -> Dict:
+        """
+        The global metrics, averaged across all active benign hosts as of the latest sample.
+
+        The dictionary is built on access, from the vector computed while processing samples.
+        """
+        global_metrics = self.__global_metrics
+        if global_metrics is None:
+            return {}
+
+        metric_keys, global_vector = global_metrics
+        return dict(zip(metric_keys, global_vector.tolist()))
+
+    @contextmanager
+    def __exclusive(self):
+        """
+        Holds the lock together with every stripe, for operations spanning all hosts.
+        """
+        with self.__lock, ExitStack() as stack:
+            for stripe in self.__stripes:
+                stack.enter_context(stripe)
+            yield
 
     def __update_config(self, new_configuration: Dict):
-        self.__logger.debug("Reloading configuration in response to `ConfigurationReloaded` event.")
-        self.__configuration = new_configuration
+        logger.debug("Reloading configuration in response to `ConfigurationReloaded` event.")
+        with self.__exclusive():
+            old_configuration = self.__configuration
+            self.__configuration = new_configuration
+            self.__resolve_configuration()
+
+            # Host metrics only need adjusting if the options shaping them have changed
+            if all(old_configuration[key] == new_configuration[key]
+                   for key in CoResidencyDetector.HOST_METRICS_OPTIONS):
+                return
 
-        for key in self.host_metrics:
-            self.host_metrics[key].reconfigure(self.__configuration["MaxSamples"],
-                                                self.__configuration["SamplesBeforeInclusion"],
-                                                self.__configuration["SamplesBeforeExclusion"],
-                                                self.__configuration["NormalizeSamples"])
+            for key in self.host_metrics:
+                self.host_metrics[key].reconfigure(self.__configuration["MaxSamples"],
+                                                    self.__configuration["SamplesBeforeInclusion"],
+                                                    self.__configuration["SamplesBeforeExclusion"],
+                                                    self.__configuration["NormalizeSamples"])
 
     def __update_metrics(self, metrics: Dict):
         """
         Updates the metrics for each host based on the provided metrics dictionary.
 
+        Samples of known hosts are recorded under the stripe of each host only. All stripes
+        are held while taking a snapshot of the hosts, and the lock alone while merging the
+        results back. The global metrics, deltas and flags are computed on the snapshot in
+        between, and the mitigation events are emitted once the locks have been released.
+
         :param metrics: A dictionary where keys are host IDs and values are dictionaries
                         of metrics for each host.
         
@@ -69,109 +132,229 @@ class CoResidencyDetector(metaclass=SingletonMeta):
         :note: The `Activity` metric is mandatory for each host. It is used to determine
                the activity status of the host.
         """
+        self.__record_samples(metrics)
+        with self.__exclusive():
+            snapshot = self.__take_snapshot()
+
+        metric_keys, active_host_ids, host_matrix, benign, thresholds = snapshot
+        global_vector = self.__compute_global_metrics(host_matrix, benign)
+        triggered = self.__compute_host_flags(
+            active_host_ids, host_matrix, global_vector, thresholds)
+
         with self.__lock:
-            for host_id in metrics.keys():
-                try:
-                    self.host_metrics[host_id].record_sample(metrics[host_id])
-                except KeyError:
-                    self.host_metrics[host_id] = \
-                        CoResidencyDetector.HostMetrics(
-                            metrics[host_id],
-                            self.__configuration["MaxSamples"],
-                            self.__configuration["SamplesBeforeInclusion"],
-                            self.__configuration["SamplesBeforeExclusion"],
-                            self.__configuration["NormalizeSamples"])
-            self.__update_global_metrics()
-            self.__update_host_deltas()
-            self.__update_host_flags()
-
-            if not self.__configuration["Mitigation"]:
+            # Replaced at once, so that readers never observe mismatched names and values
+            self.__global_metrics = None if global_vector is None else (metric_keys, global_vector)
+            if global_vector is not None:
+                self.__update_host_flags(active_host_ids, triggered)
+            events = self.__update_mitigations()
+
+        emit = self.__event_manager.emit
+        for event_name, host_ids in events:
+            emit(event_name, host_ids)
+
+    def __record_samples(self, metrics: Dict):
+        """
+        Records the sample of each host under the stripe of the host. Hosts which are new or
+        whose set of metrics has changed are (re)created under the lock as well, since they
+        alter the set of compared metrics.
+
+        :param metrics: A dictionary where keys are host IDs and values are dictionaries
+                        of metrics for each host.
+        """
+        host_metrics = self.host_metrics
+        stripes = self.__stripes
+        for host_id, sample in metrics.items():
+            stripe = stripes[hash(host_id) % CoResidencyDetector.LOCK_STRIPES]
+            host = host_metrics.get(host_id)
+            if host is not None:
+                with stripe:
+                    try:
+                        host.record_sample(sample)
+                        continue
+                    except KeyError:
+                        pass
+
+            with self.__lock, stripe:
+                self.__replace_host(host_id, sample)
+
+    def __replace_host(self, host_id, sample: Dict):
+        """
+        Creates the metrics of a new host, or restarts those of a host whose set of metrics
+        has changed. Only the window of the host is affected, never the compared metrics.
+        Must be called while holding the lock and the stripe of the host.
+        """
+        if 'Activity' not in sample:
+            logger.error("Activity metric is missing for host %s. " \
+                         "Cannot determine activity status.", str(host_id))
+            return
+
+        host = self.host_metrics.get(host_id)
+        if host is None:
+            host = self.__make_host_metrics(sample)
+            self.host_metrics[host_id] = host
+        else:
+            try:
+                # Another producer may have registered the metrics in the meantime
+                host.record_sample(sample)
                 return
+            except KeyError:
+                # The host changed the set of metrics it reports, so its window restarts
+                host.reset(sample)
 
-            # Start / Stop mitigation measures.
-            for host_id, value in self.host_flags.items():
-                if value > self.__configuration["Mitigation"]["FlagsBeforeActivation"]:
-                    self.__logger.info("Initiating mitigation on host %s.", str(host_id))
-                    self.mitigated_host_ids.add(host_id)
-                    self.__event_manager.emit(
-                        self.__configuration["EventNames"]["StartMitigation"], host_id)
-                    self.host_flags[host_id] = 0
-
-            for host_id, value in self.host_deflags.items():
-                if value > self.__configuration["Mitigation"]["DeflagsBeforeDeactivation"]:
-                    self.__logger.info("Stopping mitigation on host %s.", str(host_id))
-                    self.mitigated_host_ids.discard(host_id)
-                    self.__event_manager.emit(
-                        self.__configuration["EventNames"]["StopMitigation"], host_id)
-                    self.host_deflags[host_id] = 0
+        if host.get_keys() != self.__metric_keys:
+            logger.warning("Host %s reports the metrics %s instead of the configured %s. " \
+                           "It is left out of the comparison.",
+                           str(host_id), str(host.get_keys()), str(self.__metric_keys))
 
-    def __update_host_flags(self):
+    def __update_mitigations(self) -> list:
         """
-        Updates the flags for each host based on the deltas of their metrics.
+        Starts / Stops mitigation measures for hosts which exceeded their (de)flag limits.
+
+        :return: The (event name, host IDs) pairs to be emitted, one per event at most.
         """
-        for host_id in self.host_metrics:
-            # Skip inactive hosts from flagging
-            if not self.host_metrics[host_id].is_active():
-                continue
-
-            deltas = self.host_metrics[host_id].get_deltas()
-            trigger_flag = 1
-            for key in deltas.keys():
-                if deltas[key] <= self.__configuration["Thresholds"][key]:
-                    trigger_flag = 0
-                    break
+        events = []
+        if not self.__mitigation_enabled:
+            return events
+
+        flags_before_activation = self.__flags_before_activation
+        deflags_before_deactivation = self.__deflags_before_deactivation
+        host_flags, host_deflags = self.host_flags, self.host_deflags
 
+        start_host_ids = [host_id for host_id, value in host_flags.items()
+                          if value > flags_before_activation]
+        stop_host_ids = [host_id for host_id, value in host_deflags.items()
+                         if value > deflags_before_deactivation]
+
+        for host_id in start_host_ids:
+            logger.info("Initiating mitigation on host %s.", str(host_id))
+            host_flags[host_id] = 0
+        for host_id in stop_host_ids:
+            logger.info("Stopping mitigation on host %s.", str(host_id))
+            host_deflags[host_id] = 0
+
+        self.mitigated_host_ids.update(start_host_ids)
+        self.mitigated_host_ids.difference_update(stop_host_ids)
+
+        if start_host_ids:
+            events.append((self.__start_mitigation_event, start_host_ids))
+        if stop_host_ids:
+            events.append((self.__stop_mitigation_event, stop_host_ids))
+
+        return events
+
+    def __resolve_configuration(self):
+        """
+        Resolves the configuration values used for every sample, so that the hot paths
+        do not look them up in the nested configuration dictionary.
+        """
+        mitigation = self.__configuration["Mitigation"]
+        self.__mitigation_enabled = bool(mitigation)
+        if self.__mitigation_enabled:
+            self.__flags_before_activation = mitigation["FlagsBeforeActivation"]
+            self.__deflags_before_deactivation = mitigation["DeflagsBeforeDeactivation"]
+
+        self.__start_mitigation_event = self.__configuration["EventNames"]["StartMitigation"]
+        self.__stop_mitigation_event = self.__configuration["EventNames"]["StopMitigation"]
+
+        self.__make_host_metrics = partial(
+            CoResidencyDetector.HostMetrics,
+            max_samples=self.__configuration["MaxSamples"],
+            activity_threshold=self.__configuration["SamplesBeforeInclusion"],
+            inactivity_threshold=self.__configuration["SamplesBeforeExclusion"],
+            pref_normalized=self.__configuration["NormalizeSamples"])
+
+        # Every threshold names a metric, so the configuration also defines the compared metrics.
+        # Sorted like the columns of the hosts' metrics.
+        self.__metric_keys = tuple(sorted(set(self.__configuration["Thresholds"]) | {'Activity'}))
+
+        # Activity only decides which hosts are compared, so its column is left out of the
+        # comparison (its deviation may well be NaN) and it has no threshold.
+        thresholds = self.__configuration["Thresholds"]
+        compared_columns = np.array(
+            [column for column, key in enumerate(self.__metric_keys) if key != 'Activity'],
+            dtype=np.intp)
+        threshold_vector = np.array(
+            [np.nan if key == 'Activity' else thresholds[key] for key in self.__metric_keys],
+            dtype=np.float64)
+        self.__thresholds = (compared_columns, threshold_vector)
+
+    def __take_snapshot(self) -> tuple:
+        """
+        Captures the state of the hosts required to compute the global metrics and flags.
+
+        The average metrics of every host are stacked into a matrix (one row per host).
+        Hosts which do not report exactly the configured set of metrics cannot be compared
+        with the others, and are left out.
+
+        :return: The metric names, the IDs of the active hosts, the metrics matrix of the
+                 active hosts, the mask of benign hosts within it and the compared columns
+                 together with the threshold vector.
+        """
+        active_host_ids = [host_id for host_id, host in self.host_metrics.items()
+                           if host.is_active() and host.get_keys() == self.__metric_keys]
+        host_matrix = np.array(
+            [self.host_metrics[host_id].get_metrics_vector() for host_id in active_host_ids],
+            dtype=np.float64)
+        # As per the design, skip the inclusion of suspect hosts or inactive hosts.
+        benign = np.array([host_id not in self.mitigated_host_ids for host_id in active_host_ids],
+                          dtype=bool)
+
+        return self.__metric_keys, active_host_ids, host_matrix, benign, self.__thresholds
+
+    @staticmethod
+    def __compute_global_metrics(host_matrix: np.ndarray, benign: np.ndarray):
+        """
+        Calculates the global metrics by averaging the metrics of all benign hosts.
+
+        :return: The global metrics vector, or None if there are no benign hosts.
+        """
+        if not benign.any():
+            return None
+
+        return host_matrix[benign].mean(axis=0)
+
+    def __compute_host_flags(self, active_host_ids: list, host_matrix: np.ndarray,
+                             global_vector, thresholds: tuple):
+        """
+        Calculates the deltas of all active hosts with respect to the global metrics
+        and compares them against the thresholds at once.
+
+        :return: Whether each active host exceeds the thresholds in all compared deltas.
+        """
+        if global_vector is None:
+            return None
+
+        # The deviation in each metric is expressed in percentages.
+        # Metrics averaging 0 across all benign hosts result in infinite (or NaN) deviations.
+        compared_columns, threshold_vector = thresholds
+        host_deltas, triggered = evaluate_hosts(
+            host_matrix, global_vector, threshold_vector, compared_columns)
+
+        for host_id, deltas in zip(active_host_ids, host_deltas):
+            self.host_metrics[host_id].update_deltas(deltas)
+
+        return triggered
+
+    def __update_host_flags(self, active_host_ids: list, triggered: np.ndarray):
+        """
+        Updates the flags for each active host based on whether it exceeded the thresholds.
+        """
+        # Building the deltas report is only worth it if it is going to be logged
+        debug_enabled = logger.isEnabledFor(DEBUG)
+
+        for host_id, trigger_flag in zip(active_host_ids, triggered.tolist()):
             if trigger_flag:
-                self.__logger.debug(
-                    "Host %s flagged for exceeding thresholds in all deltas: %s.",
-                    str(host_id), deltas)
+                if debug_enabled:
+                    logger.debug(
+                        "Host %s flagged for exceeding thresholds in all deltas: %s.",
+                        host_id, self.host_metrics[host_id].get_deltas())
                 # Host exceeds in all deltas. Reset deflags.
                 if host_id in self.mitigated_host_ids:
                     self.host_deflags[host_id] = 0
                 else:
-                    try:
-                        self.host_flags[host_id] += 1
-                    except KeyError:
-                        self.host_flags[host_id] = 1
+                    self.host_flags[host_id] += 1
             elif host_id in self.mitigated_host_ids:
-                try:
-                    self.host_deflags[host_id] += 1
-                except KeyError:
-                    self.host_deflags[host_id] = 1
-
-    def __update_global_metrics(self):
-        """
-        Calculates the global metrics by averaging the metrics of all active hosts.
-
-        It skips hosts that are either suspect (in the mitigated list) or inactive.
-        """
-        self.global_metrics.clear()
-        benign_hosts = 0
-
-        for host_id in self.host_metrics:
-            # As per the design, skip the inclusion of suspect hosts or inactive hosts.
-            if host_id in self.mitigated_host_ids or not self.host_metrics[host_id].is_active():
-                continue
-
-            metrics = self.host_metrics[host_id].get_metrics()
-            benign_hosts += 1
-
-            for key, value in metrics.items():
-                try:
-                    self.global_metrics[key] += value
-                except KeyError:
-                    self.global_metrics[key] = value
-        if benign_hosts != 0:
-            for key in self.global_metrics:
-                self.global_metrics[key] /= benign_hosts
-
-    def __update_host_deltas(self):
-        for host_id in self.host_metrics:
-            # Hosts that are not active do not participate in threshold checking
-            if not self.host_metrics[host_id].is_active():
-                continue
-
-            self.host_metrics[host_id].update_deltas(self.global_metrics)
+                self.host_deflags[host_id] += 1
 
     class HostMetrics:
         """
@@ -180,66 +363,108 @@ class CoResidencyDetector(metaclass=SingletonMeta):
         It maintains a rolling window of metrics samples,
         calculates normalized metrics, and stores host metadata
         such as activity status and deltas.
+
+        Samples are stored in a ring buffer with one entry per sample, holding a row of raw
+        and a row of normalized metrics, with one column per metric.
         """
+        # Rows of each ring buffer entry
+        RAW = 0
+        NORMALIZED = 1
+
+        # One instance is kept per host, so the per-instance dictionary is avoided
+        __slots__ = ("__max_samples", "__current_samples", "__activity_threshold",
+                     "__inactivity_threshold", "__pref_normalized", "__deltas", "__active",
+                     "__keys", "__activity_index", "__samples", "__head", "__sums")
+
         def __init__(self, initial_metrics: Dict,
                            max_samples: int = 0,
                            activity_threshold: int = 0,
                            inactivity_threshold: int = 0,
                            pref_normalized: bool = True):
-            self.__metrics = {}
-            self.__normalized_metrics = {}
-            self.__logger = Logger("CoResidencyDetector.HostMetrics")
             self.__max_samples = max_samples
-            self.__current_samples = 1
             self.__activity_threshold = \
                 activity_threshold if activity_threshold > 0 else max_samples - 1
             self.__inactivity_threshold = \
                 inactivity_threshold if inactivity_threshold > 0 else 1
             self.__pref_normalized = pref_normalized
-            self.__deltas = {}
-            self.__active = False
+            self.__samples = None
+            self.reset(initial_metrics)
 
-            if 'Activity' not in initial_metrics.keys():
-                self.__logger.error("Activity metric is missing from initial metrics." \
-                                    "Cannot determine activity status.")
-                sys.exit(1)
+        def reset(self, initial_metrics: Dict):
+            """
+            Restarts the rolling window from an initial sample, e.g. after the host changed
+            the set of metrics it reports. The sample buffer is reused if its shape allows it.
 
-            for key, value in initial_metrics.items():
-                self.__metrics[key] = deque()
-                self.__metrics[key].append(value)
+            :raises ValueError: If the `Activity` metric is missing from the initial sample.
+            """
+            if 'Activity' not in initial_metrics:
+                raise ValueError("Activity metric missing")
 
-                self.__normalized_metrics[key] = deque()
-                self.__normalized_metrics[key].append(value)
+            # The column of each metric is fixed by the initial sample. Sorting the names gives
+            # every host reporting the same metrics the same columns.
+            self.__keys = tuple(sorted(initial_metrics))
+            self.__activity_index = self.__keys.index('Activity')
+            self.__current_samples = 1
+            self.__deltas = None
+            self.__active = False
+
+            shape = (self.__max_samples, 2, len(self.__keys))
+            if self.__samples is None or self.__samples.shape != shape:
+                self.__samples = np.zeros(shape, dtype=np.float64)
+            else:
+                self.__samples.fill(0)
+            # The initial sample is used as-is for both the raw and the normalized metrics
+            self.__samples[0] = [initial_metrics[key] for key in self.__keys]
+            # Entry in which the next sample is written
+            self.__head = 1 % self.__max_samples
+
+            # Running sums of the raw and normalized samples within the window
+            self.__sums = self.__samples[0].copy()
 
             # Adjust activity status
-            if sum(self.__metrics['Activity']) > self.__activity_threshold:
+            activity = self.__sums[self.RAW, self.__activity_index]
+            if activity > self.__activity_threshold:
                 self.__active = True
-            elif sum(self.__metrics['Activity']) < self.__inactivity_threshold:
+            elif activity < self.__inactivity_threshold:
                 self.__active = False
 
         def record_sample(self, sample_metrics: Dict):
             """
             Records a new sample of metrics for the host.
+
+            :raises KeyError: If the sample does not contain the same metrics as the
+                              previous ones (e.g. a custom metric has been added).
             """
-            if self.__current_samples == self.__max_samples:
-                for key, value in sample_metrics.items():
-                    self.__metrics[key].popleft()
-                    self.__normalized_metrics[key].popleft()
-            else:
-                self.__current_samples += 1
+            if len(sample_metrics) != len(self.__keys):
+                raise KeyError("Set of sampled metrics has changed.")
 
-            for key, value in sample_metrics.items():
-                self.__metrics[key].append(value)
-                self.__normalized_metrics[key].append(
-                    self.__metrics[key][-1] - self.__metrics[key][-2])
+            # Values are gathered in column order without building an intermediate list
+            sample = np.fromiter(map(sample_metrics.__getitem__, self.__keys),
+                                 dtype=np.float64, count=len(self.__keys))
+            entry = self.__samples[self.__head]
 
+            # Raw and normalized rows are evicted and accumulated together
+            if self.__current_samples < self.__max_samples:
+                self.__current_samples += 1
+            else:
+                self.__sums -= entry
+
+            # Index -1 wraps around to the previous sample once the buffer is full.
+            # The normalized row is written first, as the previous sample may be this very entry.
+            np.subtract(sample, self.__samples[self.__head - 1, self.RAW],
+                        out=entry[self.NORMALIZED])
             # Activity metric is by definition normalized.
-            self.__normalized_metrics['Activity'] = self.__metrics['Activity']
+            entry[self.NORMALIZED, self.__activity_index] = sample[self.__activity_index]
+            entry[self.RAW] = sample
+
+            self.__sums += entry
+            self.__head = (self.__head + 1) % self.__max_samples
 
             # Adjust activity status
-            if sum(self.__metrics['Activity']) > self.__activity_threshold:
+            activity = self.__sums[self.RAW, self.__activity_index]
+            if activity > self.__activity_threshold:
                 self.__active = True
-            elif sum(self.__metrics['Activity']) < self.__inactivity_threshold:
+            elif activity < self.__inactivity_threshold:
                 self.__active = False
 
         def get_metrics(self) -> Dict:
@@ -249,19 +474,29 @@ class CoResidencyDetector(metaclass=SingletonMeta):
             If `pref_normalized` is set to True, it returns the normalized metrics,
             otherwise it returns the raw metrics.
             """
-            metric_report = {}
-            collection = self.__metrics if not self.__pref_normalized else self.__normalized_metrics
+            return dict(zip(self.__keys, self.get_metrics_vector().astype(np.int64).tolist()))
 
-            for key in self.__metrics:
-                metric_report[key] = round(sum(collection[key]) / self.__current_samples)
+        def get_metrics_vector(self) -> np.ndarray:
+            """
+            Returns the average metrics for the host, ordered as in `get_keys`.
+            """
+            sums = self.__sums[self.NORMALIZED if self.__pref_normalized else self.RAW]
+            return np.round(sums / self.__current_samples)
 
-            return metric_report
+        def get_keys(self) -> tuple:
+            """
+            Returns the names of the metrics recorded for the host.
+            """
+            return self.__keys
 
-        def get_deltas(self):
+        def get_deltas(self) -> Dict:
             """
             Returns the host deltas.
             """
-            return self.__deltas
+            if self.__deltas is None:
+                return {}
+
+            return dict(zip(self.__keys, self.__deltas.tolist()))
 
         def is_active(self) -> bool:
             """
@@ -282,24 +517,31 @@ class CoResidencyDetector(metaclass=SingletonMeta):
             self.__pref_normalized = new_pref_normalized
             self.__adjust_sample_size(new_max_samples)
 
-        def update_deltas(self, global_metrics: Dict):
+        def update_deltas(self, deltas: np.ndarray):
             """
-            Re-calculates the host deltas based on the current global metrics.
+            Stores the host deltas, as computed against the current global metrics.
             """
-            metrics = self.get_metrics()
-
-            # The deviation in each metric is expressed in percentages
-            for key in metrics:
-                self.__deltas[key] = abs(1.0 - metrics[key] / global_metrics[key])
+            self.__deltas = deltas
 
         def __adjust_sample_size(self, new_max_samples: int):
             """
-            Adjusts the deuque size for metrics and normalized metrics
+            Adjusts the ring buffer for metrics and normalized metrics
             with respect to the new maximum samples.
+
+            Shrinking the buffer keeps only the most recent samples.
             """
-            if self.__max_samples > new_max_samples:
-                for _ in range(self.__max_samples - new_max_samples):
-                    for key in self.__metrics:
-                        self.__metrics[key].popleft()
-                        self.__normalized_metrics[key].popleft()
+            if new_max_samples == self.__max_samples:
+                return
+
+            kept_samples = min(self.__current_samples, new_max_samples)
+            # Entries of the kept samples, from the oldest to the most recent
+            entries = np.arange(self.__head - kept_samples, self.__head) % self.__max_samples
+
+            samples = np.zeros((new_max_samples, 2, len(self.__keys)), dtype=np.float64)
+            samples[:kept_samples] = self.__samples[entries]
+
+            self.__samples = samples
+            self.__sums = samples.sum(axis=0)
+            self.__head = kept_samples % new_max_samples
+            self.__current_samples = kept_samples
             self.__max_samples = new_max_samples
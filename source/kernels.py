@@ -0,0 +1,61 @@
+"""
+Provides the numeric kernels of the CoResidencyDetector.
+
+The kernels are compiled with Numba when it is available, which evaluates each host in a single
+pass without intermediate arrays. Otherwise, equivalent NumPy expressions are used.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _evaluate_hosts_loop(host_matrix: np.ndarray, global_vector: np.ndarray,
+                         threshold_vector: np.ndarray, compared_columns: np.ndarray,
+                         deltas: np.ndarray, triggered: np.ndarray):
+    """
+    Computes the deltas of each host and whether all of the compared ones exceed their
+    thresholds. Divisions by zero follow NumPy semantics, resulting in infinite (or NaN) deltas.
+    """
+    for row in range(host_matrix.shape[0]):
+        for col in range(host_matrix.shape[1]):
+            deltas[row, col] = abs(1.0 - host_matrix[row, col] / global_vector[col])
+
+        exceeds = True
+        for col in compared_columns:
+            exceeds = exceeds and deltas[row, col] > threshold_vector[col]
+        triggered[row] = exceeds
+
+# Compiled eagerly (and cached on disk), so that the first sample does not pay for it
+_evaluate_hosts_kernel = \
+    njit("void(f8[:, :], f8[:], f8[:], intp[:], f8[:, :], b1[:])",
+         cache=True, error_model="numpy")(_evaluate_hosts_loop) if njit is not None else None
+
+def evaluate_hosts(host_matrix: np.ndarray, global_vector: np.ndarray,
+                   threshold_vector: np.ndarray, compared_columns: np.ndarray) -> tuple:
+    """
+    Calculates the deltas of the hosts with respect to the global metrics
+    and compares the deltas of the compared columns against their thresholds.
+
+    :param host_matrix: The average metrics of each host (one row per host).
+    :param global_vector: The global metrics.
+    :param threshold_vector: The threshold of each metric. Other columns are never read.
+    :param compared_columns: The indices of the metrics compared against their thresholds.
+
+    :return: The deltas matrix, and whether each host exceeds the thresholds in all
+             compared deltas.
+    """
+    if _evaluate_hosts_kernel is not None:
+        deltas = np.empty_like(host_matrix)
+        triggered = np.empty(host_matrix.shape[0], dtype=np.bool_)
+        _evaluate_hosts_kernel(host_matrix, global_vector, threshold_vector, compared_columns,
+                               deltas, triggered)
+        return deltas, triggered
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deltas = np.abs(1.0 - host_matrix / global_vector)
+
+    return deltas, np.all(deltas[:, compared_columns] > threshold_vector[compared_columns],
+                          axis=1)
@@ -12,9 +12,14 @@ class SingletonMeta(type):
     _lock = Lock()
 
     def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            with cls._lock:
-                if cls not in cls._instances:
-                    instance = super().__call__(*args, **kwargs)
-                    cls._instances[cls] = instance
-        return cls._instances[cls]
+        # Existing instances are returned with a single lookup, without locking
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
+        with cls._lock:
+            instance = cls._instances.get(cls)
+            if instance is None:
+                instance = super().__call__(*args, **kwargs)
+                cls._instances[cls] = instance
+        return instance